@@ -0,0 +1,43 @@
+# cython: language_level=3
+"""
+The generic convolution of `BaseFilter.convolve`, compiled ahead of time with Cython and OpenMP.
+
+It is an alternative to the JIT-compiled `kernels.convolve` for installs that should neither import Numba nor pay
+its compilation on the first call. Build it with `make convolve`; the filters use it whenever it is importable.
+"""
+
+cimport cython
+from cython.parallel cimport prange
+
+ctypedef fused pixel_t:
+    unsigned char
+    float
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void convolve(const pixel_t[:, :, ::1] src, const float[:, ::1] kernel, float[:, :, ::1] dst) noexcept:
+    """
+    Weights every kernel-sized window of a padded image by the kernel, like `kernels.convolve`.
+
+    Args:
+        src (np.ndarray): The input image as a uint8 or float32 array of shape (H + kh - 1, W + kw - 1, C), padded
+                          by half the kernel size.
+        kernel (np.ndarray): The 2D float32 kernel of shape (kh, kw).
+        dst (np.ndarray): The float32 output array of shape (H, W, C).
+    """
+    cdef Py_ssize_t height = dst.shape[0], width = dst.shape[1], channels = dst.shape[2]
+    cdef Py_ssize_t kernel_height = kernel.shape[0], kernel_width = kernel.shape[1]
+    cdef Py_ssize_t i, j, k, a, b
+    cdef double acc
+    # The products of uint8 pixels and float32 weights are exact in double, so for the small kernels this is used
+    # for the sums are too, and rounding them to float32 once gives the same values as `ndimage.correlate`. The JIT
+    # kernels sum in float32 with fastmath instead, so their results can be one intensity level off from these.
+    for i in prange(height, nogil=True):
+        for j in range(width):
+            for k in range(channels):
+                acc = 0
+                for a in range(kernel_height):
+                    for b in range(kernel_width):
+                        acc = acc + <double>src[i + a, j + b, k] * kernel[a, b]
+                dst[i, j, k] = <float>acc
@@ -0,0 +1,24 @@
+"""
+Compiles the Numba kernels ahead of time into the `image_kernels` extension module, next to this file.
+
+The CLI is a short-lived process, so compiling the kernels just in time can cost more than running them. When
+`image_kernels` is importable the filters use it instead of `kernels`, which also skips importing Numba at
+runtime. Build it with `make kernels`. Numba does not support `parallel=True` ahead of time, so the compiled
+kernels are single-threaded; delete the module to go back to the multithreaded JIT kernels.
+"""
+
+import os
+
+from numba.pycc import CC
+
+import kernels
+
+cc = CC("image_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Export the pure-Python definitions, so both builds share a single implementation of each kernel.
+cc.export("box_blur_3x3", "void(u1[:, :, :], u1[:, :, :])")(kernels.box_blur_3x3.py_func)
+cc.export("sharpen_3x3", "void(f4[:, :, :], f4[:, :, :])")(kernels.sharpen_3x3.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
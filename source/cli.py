@@ -1,7 +1,7 @@
 import argparse
+import functools
 import sys
-from image_processor import ImageProcessor
-from source.enums import FilterName
+from source.enums import AdjustmentType, FilterName
 import logging
 
 # Configure logging at the top of your script
@@ -14,6 +14,10 @@ logging.basicConfig(
     ],
 )
 
+# The values accepted by --filter, computed once when the module is imported.
+_FILTER_CHOICES = tuple(f.value for f in FilterName)
+_ADJUSTMENT_CHOICES = tuple(a.value for a in AdjustmentType)
+
 
 class CommandLineInterface:
     """
@@ -35,6 +39,11 @@ class CommandLineInterface:
             SystemExit: Exits the program if an error occurs during image processing.
         """
         args = self.parser.parse_args()
+        self._validate_adjustments(args)
+        # Imported here rather than at module level so that `--help` and argument errors exit before NumPy,
+        # PIL and the compiled kernels are loaded.
+        from image_processor import ImageProcessor
+
         try:
             processor = ImageProcessor(args.image)
             self._handle_filters(processor, args)
@@ -48,9 +57,11 @@ class CommandLineInterface:
             self._output_error_and_exit_program(e, "Unexpected error occurred")
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _setup_parser() -> argparse.ArgumentParser:
         """
-        Sets up and configures the argument parser with options for the image editing tool.
+        Sets up and configures the argument parser with options for the image editing tool. The parser is built
+        once and shared by every instance; parsing arguments doesn't modify it.
 
         Returns:
             argparse.ArgumentParser: The configured parser with all the image editing options.
@@ -60,7 +71,7 @@ class CommandLineInterface:
         parser.add_argument(
             "--filter",
             action="append",
-            choices=[f.value for f in FilterName],
+            choices=_FILTER_CHOICES,
             help="Apply a filter e.g., --filter blur",
         )
         parser.add_argument(
@@ -75,10 +86,31 @@ class CommandLineInterface:
         parser.add_argument("--strength", type=float, default=1.0, help="Strength of the filter")
         return parser
 
+    def _validate_adjustments(self, args):
+        """
+        Checks the --adjust pairs the same way argparse checks the --filter choices, so that a mistyped
+        adjustment exits before the image is opened and decoded.
+
+        Parameters:
+            args (Namespace): Command line arguments containing adjustments and their values.
+
+        Raises:
+            SystemExit: Exits the program if an adjustment or its value is invalid.
+        """
+        for adjustment, value in args.adjust or ():
+            if adjustment not in _ADJUSTMENT_CHOICES:
+                self.parser.error(
+                    f"argument --adjust: invalid choice: '{adjustment}' (choose from {', '.join(_ADJUSTMENT_CHOICES)})"
+                )
+            try:
+                float(value)
+            except ValueError:
+                self.parser.error(f"argument --adjust: invalid float value for {adjustment}: '{value}'")
+
     @staticmethod
     def _handle_filters(processor, args):
         """
-        Applies specified filters to the image using the provided strength.
+        Applies specified filters to the image using the provided strength, in a single pass over the image.
 
         Parameters:
             processor (ImageProcessor): The processor to apply filters.
@@ -89,8 +121,7 @@ class CommandLineInterface:
         """
         try:
             if args.filter:
-                for filter_name in args.filter:
-                    processor.apply_filter(filter_name, args.strength)
+                processor.apply_filters(args.filter, args.strength)
         except ValueError as e:
             CommandLineInterface._output_error_and_exit_program(e, "Error applying filter")
 
@@ -1,4 +1,5 @@
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageMode
 
 
 class CustomImage:
@@ -10,28 +11,39 @@ class CustomImage:
     MAX_INTENSITY = 255
     MIN_INTENSITY = 0
 
+    # The PIL mode of an image array with each number of channels
+    _MODES_BY_CHANNELS = {2: "LA", 3: "RGB", 4: "RGBA"}
+
     def __init__(self, path: str):
         """
         Initializes a new instance of CustomImage by loading an image from a specified file path.
         """
+        self._array_cache = {}  # Maps a PIL mode to the read-only array of the current image in that mode
         try:
-            with Image.open(path) as img:
-                self.image = img.copy()  # Make a copy of the image to work with
+            # Decode now rather than copying the opened image, and surface a corrupt file here as an IOError instead
+            # of on the first filter. Leaving the block closes the file, which PIL keeps open for multi-frame images
+            # such as animated GIFs; the decoded pixels of the first frame stay in the image.
+            with Image.open(path) as image:
+                image.load()
+            self.image = image
         except IOError as e:
             raise IOError(f"Unable to open image: {e}") from e
 
-    def save(self, path: str) -> None:
+    def save(self, path, image_format: str = None) -> None:
         """
-        Saves the current image to a specified file path.
+        Saves the current image to a specified file path, or writes it to a file object.
 
         Args:
-            path (str): The file path where the image will be saved.
+            path (str or file object): The file path where the image will be saved, or a binary file object, such
+                                       as an io.BytesIO, to write it to.
+            image_format (str, optional): The PIL format to save the image in, e.g. "PNG". Defaults to the one of
+                                          the file extension; a file object has none, so it needs a format.
 
         Raises:
             IOError: If the image cannot be saved, possibly due to an unsupported format or permissions issue.
         """
         try:
-            self.image.save(path)
+            self.image.save(path, format=image_format)
         except IOError as e:
             raise IOError(f"Unable to save image: {e}") from e
 
@@ -44,14 +56,89 @@ class CustomImage:
         """
         return self.image
 
-    def set_image(self, image: Image.Image) -> None:
+    def set_image(self, image: Image.Image, array: np.ndarray = None) -> None:
         """
         Sets the image of this CustomImage instance to a new PIL Image object and updates related properties.
 
         Args:
             image (Image.Image): A new PIL Image object to replace the current image.
+            array (np.ndarray, optional): The pixels of `image` as a uint8 array, if the caller already has them.
+                                          It is cached so the next `as_array` call in `image.mode` is free.
+                                          Only a read-only view of it is kept; the array itself is left as is.
         """
         self.image = image
+        self._array_cache.clear()
+        if array is not None:
+            array = array.view()
+            array.flags.writeable = False
+            self._array_cache[image.mode] = array
+
+    def has_byte_bands(self) -> bool:
+        """
+        Tells whether every band of the image is stored in one byte, as `as_array` requires of the mode it is
+        called with. Bilevel ("1"), 16-bit ("I;16"), 32-bit ("I") and float ("F") images are not.
+
+        Returns:
+            bool: True if the values of the image are uint8.
+        """
+        return ImageMode.getmode(self.image.mode).typestr == "|u1"
+
+    def has_array_mode(self) -> bool:
+        """
+        Tells whether the image is in one of the modes `set_array` makes images in: L, LA, RGB or RGBA. The array
+        of an image in another mode, such as P or CMYK, would be given back in one of those instead.
+
+        Returns:
+            bool: True if `set_array(as_array(mode))` keeps the mode of the image.
+        """
+        return self.image.mode == "L" or self.image.mode in self._MODES_BY_CHANNELS.values()
+
+    def as_array(self, mode: str = "RGB") -> np.ndarray:
+        """
+        Returns the image as a NumPy array in the given mode. The conversion is done once and reused until the
+        image is replaced, so consecutive filters don't each convert and copy the same pixels.
+
+        Args:
+            mode (str): The PIL mode to convert the image to, e.g. "RGB" or "L". Every band of it must be one byte.
+
+        Returns:
+            np.ndarray: A read-only uint8 array of shape (H, W, C), or (H, W) for single-band modes.
+        """
+        if mode not in self._array_cache:
+            # PIL copies the image even when converting to the mode it already has, so skip the conversion then.
+            converted = self.image if self.image.mode == mode else self.image.convert(mode)
+            shape = (converted.height, converted.width, len(converted.getbands()))
+            # Wrap the raw pixel bytes directly; the resulting array is read-only because bytes are immutable.
+            array = np.frombuffer(converted.tobytes(), dtype=np.uint8).reshape(shape)
+            if shape[2] == 1:
+                array = array.reshape(shape[:2])
+            self._array_cache[mode] = array
+        return self._array_cache[mode]
+
+    def set_array(self, array: np.ndarray) -> None:
+        """
+        Replaces the image with the pixels of a uint8 array, keeping the array cached for the next `as_array` call.
+        A contiguous uint8 array is used without copying, so it must not be written to afterwards.
+
+        Args:
+            array (np.ndarray): A uint8 array of shape (H, W) for a grayscale image, or (H, W, 2), (H, W, 3) or
+                                (H, W, 4) for an LA, RGB or RGBA one.
+
+        Raises:
+            ValueError: If the array has another number of dimensions or channels.
+        """
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        if array.ndim == 2:
+            mode = "L"
+        elif array.ndim == 3 and array.shape[2] in self._MODES_BY_CHANNELS:
+            mode = self._MODES_BY_CHANNELS[array.shape[2]]
+        else:
+            raise ValueError(f"Cannot make an image from an array of shape {array.shape}.")
+        # Hand PIL the array's own buffer rather than a bytes copy of it. Grayscale and RGBA images share their
+        # memory with the array; LA and RGB are stored with padding bytes per pixel by PIL, so they are copied
+        # into the image once.
+        image = Image.frombuffer(mode, (array.shape[1], array.shape[0]), array, "raw", mode, 0, 1)
+        self.set_image(image, array)
 
     def show(self) -> None:
         """
@@ -66,7 +153,8 @@ class CustomImage:
         Returns:
             CustomImage: The current instance with the updated image.
         """
-        self.image = self.image.convert("L")
+        if self.image.mode != "L":  # Converting to the same mode would only copy the pixels
+            self.set_image(self.image.convert("L"))
         return self
 
     def convert_to_rgb(self) -> "CustomImage":
@@ -76,5 +164,6 @@ class CustomImage:
         Returns:
             CustomImage: The current instance with the updated image.
         """
-        self.image = self.image.convert("RGB")
+        if self.image.mode != "RGB":  # Converting to the same mode would only copy the pixels
+            self.set_image(self.image.convert("RGB"))
         return self
@@ -1,10 +1,13 @@
-import colorsys
 from functools import partial
 import numpy as np
+from PIL import Image
 from source.custom_image import CustomImage
-from filters import BlurFilter, EdgeDetectionFilter, SharpenFilter
+from filters import BlurFilter, EdgeDetectionFilter, SharpenFilter, kernels
+from pipeline import FilterPipeline
 from source.enums import FilterName, AdjustmentType
-from PIL import Image
+
+# The parallel ufuncs for the adjustments come with the JIT kernels only; Numba cannot compile ufuncs ahead of time.
+_adjustment_kernels = kernels if hasattr(kernels, "adjust_saturation") else None
 
 
 class ImageProcessor:
@@ -16,6 +19,10 @@ class ImageProcessor:
         filters (dict): A dictionary mapping filter names to their corresponding filter instances.
     """
 
+    # Every value a uint8 channel can take. Brightness and contrast map each pixel independently of the others, so
+    # they are computed once per value into a lookup table instead of once per pixel in float32.
+    _INTENSITIES = np.arange(CustomImage.MAX_INTENSITY + 1, dtype=np.float32)
+
     def __init__(self, image_path: str) -> None:
         """
         Initializes the ImageProcessor with an image and sets up available filters.
@@ -41,13 +48,30 @@ class ImageProcessor:
         Raises:
             ValueError: If the filter name is not supported.
         """
-        if filter_name in self.filters:
-            filter_instance = self.filters[filter_name]
-            for i in range(int(strength)):
-                filter_instance.apply(self.custom_image)
+        self.apply_filters([filter_name], strength)
 
-        else:
-            raise ValueError(f"Filter '{filter_name}' not supported.")
+    def apply_filters(self, filter_names: list, strength: float) -> None:
+        """
+        Applies several filters in order, each one `strength` times. The image is streamed through all of them
+        in a single FilterPipeline pass rather than materializing an intermediate image per application.
+
+        Args:
+            filter_names (list): The names of the filters to apply, in order.
+            strength (float): The strength of the filters to apply.
+
+        Raises:
+            ValueError: If one of the filter names is not supported. No filter is applied in that case.
+        """
+        pipeline = FilterPipeline()
+        for filter_name in filter_names:
+            if filter_name not in self.filters:
+                raise ValueError(f"Filter '{filter_name}' not supported.")
+            for _ in range(int(strength)):
+                pipeline.add(self.filters[filter_name])
+
+        if pipeline.ops:
+            filtered_array = pipeline.run(self.custom_image.as_array(pipeline.mode))
+            self.custom_image.set_array(filtered_array)
 
     def adjust_image(self, adjustment: str, value: float) -> None:
         """
@@ -73,14 +97,98 @@ class ImageProcessor:
         else:
             raise ValueError(f"Adjustment type '{adjustment}' not supported.")
 
-    def save_image(self, path: str) -> None:
+    def pipeline(self, steps: list) -> None:
+        """
+        Applies a recipe of adjustments and filters in order, such as
+        `[("adjust", "brightness", 10), ("filter", "blur", 2)]`. The result is the same as calling `adjust_image` and
+        `apply_filters` for one step after another.
+
+        The image stays a uint8 array from the first step to the last instead of going through a PIL image after
+        each one. Brightness and contrast map every intensity on its own, so a run of them is composed into a
+        single lookup table that the pixels go through once; a contrast step only needs the histogram of the
+        pixels for the mean of the pending result. A run of filters is streamed through a single FilterPipeline.
+
+        Args:
+            steps (list): The ("adjust", adjustment, value) and ("filter", filter_name, strength) steps to apply.
+
+        Raises:
+            ValueError: If a step, adjustment or filter is not supported. No step is applied in that case.
+        """
+        for kind, name, _ in steps:
+            if kind == "filter":
+                if name not in self.filters:
+                    raise ValueError(f"Filter '{name}' not supported.")
+            elif kind == "adjust":
+                if name not in {adjustment.value for adjustment in AdjustmentType}:
+                    raise ValueError(f"Adjustment type '{name}' not supported.")
+            else:
+                raise ValueError(f"Step '{kind}' not supported.")
+
+        if not steps:
+            return
+        if not self.custom_image.has_array_mode():
+            # The arrays below are uint8 and are written back with set_array, which would read a P image as the L
+            # image of its indices or a CMYK one as RGBA. Each step converts the image to a mode that set_array
+            # gives back, so apply the first one on its own.
+            kind, name, value = steps[0]
+            if kind == "filter":
+                self.apply_filters([name], value)
+            else:
+                self.adjust_image(name, value)
+            steps = steps[1:]
+
+        image_array = self.custom_image.as_array(self.custom_image.get_image().mode)
+        lookup_table = None  # The composition of the brightness and contrast tables not applied yet
+        pipeline = FilterPipeline()
+        for kind, name, value in steps:
+            if kind == "filter":
+                image_array, lookup_table = self._map_array(image_array, lookup_table), None
+                for _ in range(int(value)):
+                    pipeline.add(self.filters[name])
+                continue
+            if pipeline.ops:
+                image_array = pipeline.run(FilterPipeline._convert(image_array, pipeline.mode))
+                pipeline = FilterPipeline()
+
+            if name == AdjustmentType.CONTRAST.value:
+                # The contrast is adjusted in the mode of the image, so it composes with the pending table as is.
+                if lookup_table is None:
+                    pixel_sum = self._pixel_sum(image_array)
+                else:
+                    counts = np.reshape(Image.fromarray(image_array).histogram(), (-1, len(lookup_table)))
+                    pixel_sum = int(counts.sum(axis=0) @ lookup_table.astype(np.int64))
+                table = self._contrast_table(self._normalized_mean(pixel_sum, image_array.size), value)
+                lookup_table = table if lookup_table is None else table[lookup_table]
+                continue
+
+            # Brightness and saturation are adjusted in RGB, which the pending table has to be applied before.
+            if image_array.ndim != 3 or image_array.shape[2] != 3:
+                image_array, lookup_table = self._map_array(image_array, lookup_table), None
+                image_array = FilterPipeline._convert(image_array, "RGB")
+            if name == AdjustmentType.BRIGHTNESS.value:
+                table = self._brightness_table(value)
+                lookup_table = table if lookup_table is None else table[lookup_table]
+            else:
+                image_array, lookup_table = self._map_array(image_array, lookup_table), None
+                if _adjustment_kernels is not None:
+                    image_array = _adjustment_kernels.adjust_saturation(image_array, value)
+                else:
+                    image_array = self._saturate(image_array, value)
+
+        image_array = self._map_array(image_array, lookup_table)
+        if pipeline.ops:
+            image_array = pipeline.run(FilterPipeline._convert(image_array, pipeline.mode))
+        self.custom_image.set_array(image_array)
+
+    def save_image(self, path, image_format: str = None) -> None:
         """
-        Saves the processed image to the specified path.
+        Saves the processed image to the specified path, or writes it to a file object.
 
         Args:
-            path (str): The file path where the image will be saved.
+            path (str or file object): The file path where the image will be saved, or a binary file object.
+            image_format (str, optional): The PIL format to save the image in. Required for a file object.
         """
-        self.custom_image.save(path)
+        self.custom_image.save(path, image_format)
 
     def display_image(self) -> None:
         """
@@ -101,15 +209,31 @@ class ImageProcessor:
                                       may lead to clipping where pixel values are pushed to the
                                       minimum or maximum value (0 or 255).
         """
-        image_array = np.asarray(self.custom_image.convert_to_rgb().get_image(), dtype=np.float32)
+        if _adjustment_kernels is not None:
+            # Add the value to every pixel on all cores
+            brightened_array = _adjustment_kernels.adjust_brightness(
+                self.custom_image.as_array("RGB"), np.float32(brightness_value)
+            )
+            self.custom_image.set_array(brightened_array)
+            return
+
+        # Map the pixels through the table and save to custom_image
+        self._map_intensities(self._brightness_table(brightness_value), "RGB")
+
+    @classmethod
+    def _brightness_table(cls, brightness_value: float) -> np.ndarray:
+        """
+        Adds the brightness value to every possible intensity, once.
 
-        # Apply brightness adjustment by adding the value
-        image_array = np.clip(
-            image_array + brightness_value, CustomImage.MIN_INTENSITY, CustomImage.MAX_INTENSITY
-        )
+        Args:
+            brightness_value (float): The value to add to each pixel's color value.
 
-        # Convert back to Image and save to custom_image
-        self.custom_image.set_image(Image.fromarray(image_array.astype("uint8")))
+        Returns:
+            np.ndarray: The brightened uint8 value of each of the 256 intensities.
+        """
+        return np.clip(
+            cls._INTENSITIES + brightness_value, CustomImage.MIN_INTENSITY, CustomImage.MAX_INTENSITY
+        ).astype(np.uint8)
 
     def _adjust_contrast(self, contrast_factor: float) -> None:
         """
@@ -122,9 +246,37 @@ class ImageProcessor:
                                      increases contrast, less than 1 but greater than 0
                                      decreases contrast.
         """
+        if not self.custom_image.has_byte_bands():
+            self._adjust_wide_contrast(contrast_factor)
+            return
+
+        image = self.custom_image.get_image()
+        image_array = self.custom_image.as_array(image.mode)
+
+        mean = self._normalized_mean(self._pixel_sum(image_array), image_array.size)
+
+        if _adjustment_kernels is not None:
+            # Apply the contrast factor to every pixel on all cores
+            contrasted_array = _adjustment_kernels.adjust_contrast(
+                image_array, mean, np.float32(contrast_factor)
+            )
+            self.custom_image.set_array(contrasted_array)
+            return
+
+        # Update image
+        self._map_intensities(self._contrast_table(mean, contrast_factor), image.mode)
+
+    def _adjust_wide_contrast(self, contrast_factor: float) -> None:
+        """
+        Adjusts the contrast of an image whose values aren't single bytes, such as a 16-bit or a bilevel one, which
+        256-entry lookup tables can't map. The values are normalized by dividing them by 255 like 8-bit ones, and
+        the result is an L image.
+
+        Args:
+            contrast_factor (float): Factor to adjust the contrast by.
+        """
         image_array = np.asarray(self.custom_image.get_image(), dtype=np.float32)
-        # Normalize the image array to [0, 1] by dividing by the maximum intensity value
-        image_array /= CustomImage.MAX_INTENSITY
+        image_array = image_array / np.float32(CustomImage.MAX_INTENSITY)
 
         # Apply contrast factor
         mean = np.mean(image_array)
@@ -132,41 +284,167 @@ class ImageProcessor:
 
         # Clip values to [0, 1] and convert back to [0, 255]
         image_array = np.clip(image_array, 0, 1) * CustomImage.MAX_INTENSITY
+        self.custom_image.set_array(image_array.astype(np.uint8))
 
-        # Update image
-        self.custom_image.set_image(Image.fromarray(image_array.astype('uint8')))
+    @staticmethod
+    def _pixel_sum(image_array: np.ndarray) -> np.uint64:
+        """
+        Sums the uint8 values of an image as integers, a row at a time in uint32 and then the row sums in uint64,
+        rather than converting every value to float64 as `mean()` does. The sum is exact either way.
+
+        Args:
+            image_array (np.ndarray): The image as a uint8 array.
+
+        Returns:
+            np.uint64: The sum of every channel value.
+        """
+        return image_array.reshape(image_array.shape[0], -1).sum(axis=1, dtype=np.uint32).sum(dtype=np.uint64)
+
+    @staticmethod
+    def _normalized_mean(pixel_sum: int, pixel_count: int) -> np.float32:
+        """
+        Computes the mean intensity of an image, normalized to [0, 1], from the exact sum of its values.
+
+        Args:
+            pixel_sum (int): The sum of every channel value of the image.
+            pixel_count (int): How many channel values were summed.
+
+        Returns:
+            np.float32: The normalized mean.
+        """
+        return np.float32(pixel_sum / pixel_count / CustomImage.MAX_INTENSITY)
+
+    @classmethod
+    def _contrast_table(cls, mean: np.float32, contrast_factor: float) -> np.ndarray:
+        """
+        Applies the contrast factor to every possible intensity, normalized to [0, 1]. Every output value depends
+        only on the input value, so this replaces converting the whole image to float.
+
+        Args:
+            mean (np.float32): The normalized mean intensity of the image.
+            contrast_factor (float): Factor to adjust the contrast by.
+
+        Returns:
+            np.ndarray: The contrasted uint8 value of each of the 256 intensities.
+        """
+        lookup_table = cls._INTENSITIES / np.float32(CustomImage.MAX_INTENSITY)
+        lookup_table = mean + (lookup_table - mean) * contrast_factor
+
+        # Clip values to [0, 1] and convert back to [0, 255]
+        lookup_table = np.clip(lookup_table, 0, 1) * CustomImage.MAX_INTENSITY
+        return lookup_table.astype(np.uint8)
+
+    def _map_intensities(self, lookup_table: np.ndarray, mode: str) -> None:
+        """
+        Replaces every channel value of the image by its entry in a lookup table. The image is mapped as its array
+        in `mode` and written back with `set_array`, like the Numba kernels do, so both give an image of the same
+        mode: a palette image gives an L one of its mapped indices, and a CMYK one an RGBA one.
+
+        Args:
+            lookup_table (np.ndarray): The uint8 value for each of the 256 possible intensities.
+            mode (str): The PIL mode to map the image in.
+        """
+        self.custom_image.set_array(self._map_array(self.custom_image.as_array(mode), lookup_table))
+
+    @staticmethod
+    def _map_array(image_array: np.ndarray, lookup_table: np.ndarray) -> np.ndarray:
+        """
+        Replaces every channel value of an image array by its entry in a lookup table.
+
+        PIL maps the uint8 pixels through the table in a single pass in C, while indexing the table with a NumPy
+        array would first widen the whole array to integer indices.
+
+        Args:
+            image_array (np.ndarray): The image as a uint8 array.
+            lookup_table (np.ndarray): The uint8 value for each of the 256 possible intensities, or None to leave
+                                       the image as it is.
+
+        Returns:
+            np.ndarray: The mapped image array.
+        """
+        if lookup_table is None:
+            return image_array
+        image = Image.fromarray(image_array)
+        return np.asarray(image.point(lookup_table.tolist() * len(image.getbands())))
 
     def _adjust_saturation(self, saturation_factor: float) -> None:
         """
-        Adjusts the image saturation using the colorsys library for conversion between RGB and HSV.
+        Adjusts the image saturation by converting the pixels between RGB and HSV with the formulas of the colorsys
+        library.
 
         Args:
             saturation_factor (float): The factor by which to adjust the saturation.
         """
-        # Convert image to numpy array
-        image_array = np.asarray(self.custom_image.get_image(), dtype=np.float32)
+        image_array = self.custom_image.as_array("RGB")
 
-        # Initialize an array for the adjusted image
-        adjusted_array = np.zeros_like(image_array)
+        if _adjustment_kernels is not None:
+            # Convert every pixel to HSV and back on all cores, with the same formulas as colorsys
+            self.custom_image.set_array(_adjustment_kernels.adjust_saturation(image_array, saturation_factor))
+            return
 
-        # Loop over the image pixels
-        for i in range(image_array.shape[0]):
-            for j in range(image_array.shape[1]):
-                # Normalize RGB values to [0, 1]
-                r, g, b = image_array[i, j] / float(CustomImage.MAX_INTENSITY)
+        # Convert the whole image to HSV and back at once, and update the image
+        self.custom_image.set_array(self._saturate(image_array, saturation_factor))
 
-                # Convert to HSV, adjust saturation, convert back to RGB
-                h, s, v = colorsys.rgb_to_hsv(r, g, b)
-                s = max(min(s * saturation_factor, 1), 0)  # Saturate within bounds [0, 1]
-                r, g, b = colorsys.hsv_to_rgb(h, s, v)
+    @staticmethod
+    def _saturate(image_array: np.ndarray, saturation_factor: float) -> np.ndarray:
+        """
+        Scales the HSV saturation of every pixel with whole-array NumPy operations. The formulas are those of
+        `colorsys.rgb_to_hsv` and `colorsys.hsv_to_rgb`, and the channels are promoted from float32 to float64 at the
+        same steps as when colorsys is called on float32 pixels, so the result is the same as converting the pixels
+        one at a time.
 
-                # Put the pixel back in the adjusted array
-                adjusted_array[i, j] = np.array([r, g, b]) * float(CustomImage.MAX_INTENSITY)
+        Args:
+            image_array (np.ndarray): The image as a uint8 array of shape (H, W, 3).
+            saturation_factor (float): The factor by which to adjust the saturation.
 
-        # Clip the values to be in the byte range and convert back to uint8
-        adjusted_array = np.clip(adjusted_array, CustomImage.MIN_INTENSITY, CustomImage.MAX_INTENSITY).astype(
-            "uint8"
+        Returns:
+            np.ndarray: The adjusted image as a uint8 array of shape (H, W, 3).
+        """
+        # Normalize RGB values to [0, 1]
+        r, g, b = np.moveaxis(image_array.astype(np.float32) / np.float32(CustomImage.MAX_INTENSITY), 2, 0)
+
+        # Convert to HSV. Gray pixels, whose channels are all equal, have no hue and no saturation.
+        max_c = np.maximum(np.maximum(r, g), b)
+        min_c = np.minimum(np.minimum(r, g), b)
+        v = max_c
+        range_c = max_c - min_c
+        is_gray = range_c == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = range_c / max_c
+            rc = (max_c - r) / range_c
+            gc = (max_c - g) / range_c
+            bc = (max_c - b) / range_c
+        # Python floats turn float32 scalars into float64, but leave float32 arrays as they are, so the promotions
+        # are spelled out: bc - gc is computed in float32, and everything that involves a Python float in float64.
+        h = (bc - gc).astype(np.float64)
+        rc, gc, bc = rc.astype(np.float64), gc.astype(np.float64), bc.astype(np.float64)
+        h = np.where(r == max_c, h, np.where(g == max_c, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = np.where(is_gray, 0.0, (h / 6.0) % 1.0)
+        s = np.where(is_gray, 0.0, s.astype(np.float64))
+
+        # Adjust saturation, within bounds [0, 1]
+        s = np.clip(s * saturation_factor, 0, 1)
+
+        # Convert back to RGB from the sector of the hue circle each pixel falls in
+        v = v.astype(np.float64)
+        sector = (h * 6.0).astype(np.int64)
+        f = (h * 6.0) - sector
+        p = v * (1.0 - s)
+        q = v * (1.0 - s * f)
+        t = v * (1.0 - s * (1.0 - f))
+        # Unsaturated pixels are gray again, which is the extra choice at the end
+        sector = np.where(s == 0.0, 6, sector % 6)
+        choices = (
+            (v, t, p),
+            (q, v, p),
+            (p, v, t),
+            (p, q, v),
+            (t, p, v),
+            (v, p, q),
+            (v, v, v),
         )
+        adjusted_array = np.stack([np.choose(sector, channel) for channel in zip(*choices)], axis=2)
 
-        # Update the image
-        self.custom_image.set_image(Image.fromarray(adjusted_array))
+        # Clip the values to be in the byte range and convert back to uint8
+        adjusted_array = (adjusted_array * float(CustomImage.MAX_INTENSITY)).astype(np.float32)
+        return np.clip(adjusted_array, CustomImage.MIN_INTENSITY, CustomImage.MAX_INTENSITY).astype("uint8")
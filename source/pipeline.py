@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from filters import BaseFilter, KERNELS_MULTITHREADED
+
+
+class FilterPipeline:
+    """
+    Runs a sequence of filters over an image one block of rows at a time, so that only the final result is
+    materialized at full size instead of one intermediate image per filter.
+
+    Each block is read together with as many extra rows above and below it as the halos of all the filters add
+    up to. Every filter consumes its own halo, so after the last one exactly the block's rows remain, and the
+    result is identical to applying the filters to the whole image one after another.
+
+    Since the blocks are independent, they are filtered on a pool of threads. NumPy, SciPy and PIL release the
+    GIL inside their C loops, so the threads run in parallel.
+    """
+
+    DEFAULT_BLOCK_ROWS = 128
+
+    def __init__(self, block_rows: int = DEFAULT_BLOCK_ROWS, max_workers: int = None) -> None:
+        """
+        Initializes an empty pipeline.
+
+        Args:
+            block_rows (int): How many output rows to compute per block.
+            max_workers (int, optional): How many blocks to filter at the same time. Defaults to one per CPU.
+                                         Always one while the JIT kernels are in use: they already use every
+                                         core for each block, and Numba's default threading layer aborts the
+                                         process when it is called from several threads at once.
+        """
+        self.ops = []
+        self.block_rows = block_rows
+        if KERNELS_MULTITHREADED:
+            max_workers = 1
+        elif max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+
+    @property
+    def mode(self) -> str:
+        """
+        The PIL mode the pipeline expects its input in, which is the mode of its first filter.
+        """
+        return self.ops[0].MODE
+
+    def add(self, image_filter: BaseFilter) -> "FilterPipeline":
+        """
+        Appends a filter to the end of the pipeline.
+
+        Args:
+            image_filter (BaseFilter): The filter to run after the ones already added.
+
+        Returns:
+            FilterPipeline: The current instance, so calls can be chained.
+        """
+        self.ops.append(image_filter)
+        return self
+
+    def run(self, image_array: np.ndarray) -> np.ndarray:
+        """
+        Runs all the filters of the pipeline over an image.
+
+        Args:
+            image_array (np.ndarray): The image as a uint8 array in `mode`.
+
+        Returns:
+            np.ndarray: The filtered image as a uint8 array in the output mode of the last filter.
+
+        Raises:
+            ValueError: If the image is smaller than the kernel of one of the filters.
+        """
+        for op in self.ops:
+            op.check_size(image_array, op.HALO)
+        height = image_array.shape[0]
+        halo = sum(op.HALO for op in self.ops)
+        starts = range(0, height, self.block_rows)
+
+        # The first block tells the shape and type of the output; every other block then writes its own rows.
+        first_block = self._run_block(image_array, 0, min(self.block_rows, height), halo)
+        output_array = np.empty((height,) + first_block.shape[1:], dtype=first_block.dtype)
+        output_array[: len(first_block)] = first_block
+
+        def fill_block(start: int) -> None:
+            stop = min(start + self.block_rows, height)
+            output_array[start:stop] = self._run_block(image_array, start, stop, halo)
+
+        if self.max_workers > 1 and len(starts) > 2:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(fill_block, starts[1:]))  # Consume the results so worker errors are raised
+        else:
+            for start in starts[1:]:
+                fill_block(start)
+        return output_array
+
+    def _run_block(self, image_array: np.ndarray, start: int, stop: int, halo: int) -> np.ndarray:
+        """
+        Runs all the filters over the rows [start, stop) of an image.
+
+        Args:
+            image_array (np.ndarray): The whole input image.
+            start (int): The first output row of the block.
+            stop (int): One past the last output row of the block.
+            halo (int): The sum of the halos of all the filters.
+
+        Returns:
+            np.ndarray: The filtered rows.
+        """
+        height = image_array.shape[0]
+        top, bottom = max(start - halo, 0), min(stop + halo, height)
+        block = image_array[top:bottom]
+        # Every filter pads into the same buffer. The blocks only lose rows from filter to filter, so the padded
+        # block of the first filter is large enough for the following ones as long as their mode and halo match.
+        padded_block = None
+        for op in self.ops:
+            block = self._convert(block, op.MODE)
+            padded_shape = (block.shape[1] + 2 * op.HALO,) + block.shape[2:]
+            if (
+                padded_block is None
+                or padded_block.shape[1:] != padded_shape
+                or padded_block.dtype != block.dtype
+                or len(padded_block) < len(block) + 2 * op.HALO
+            ):
+                buffer = None
+            else:
+                buffer = padded_block
+            # Only the real image borders are mirrored; inside the image the extra rows provide the context.
+            padded_block = op.pad(block, op.HALO, pad_top=top == 0, pad_bottom=bottom == height, out=buffer)
+            block = op.filter_array(padded_block)
+            if top > 0:
+                top += op.HALO
+            if bottom < height:
+                bottom -= op.HALO
+        return block[start - top: stop - top]
+
+    @staticmethod
+    def _convert(block: np.ndarray, mode: str) -> np.ndarray:
+        """
+        Converts a block of rows to the given PIL mode. Mode conversions are per pixel, so converting a block
+        gives the same pixels as converting the whole image.
+
+        Args:
+            block (np.ndarray): The rows to convert.
+            mode (str): The PIL mode to convert to.
+
+        Returns:
+            np.ndarray: The block in the requested mode.
+        """
+        block_image = Image.fromarray(block)
+        if block_image.mode == mode:
+            return block
+        return np.asarray(block_image.convert(mode))
@@ -0,0 +1,51 @@
+"""
+Benchmarks of the filters and adjustments on the sample image, run with `make bench`.
+
+The file name doesn't match the test_*.py pattern, so a plain pytest run doesn't collect these and the tests stay
+fast. Every round starts from a fresh copy of the decoded image, which is made outside of the timing.
+"""
+
+import copy
+import os
+import pytest
+import source.enums as enums
+from source.image_processor import ImageProcessor
+
+pytest.importorskip("pytest_benchmark")
+
+SAMPLE_IMAGE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "../input/image_to_filter.jpg"))
+
+
+@pytest.fixture(scope="module")
+def base_processor():
+    """Decode the sample image once, before any benchmark starts."""
+    if not os.path.exists(SAMPLE_IMAGE_PATH):
+        pytest.skip("sample image missing")
+    return ImageProcessor(SAMPLE_IMAGE_PATH)
+
+
+def run_on_copies(benchmark, base_processor, function, rounds=10):
+    """Benchmark a function of an ImageProcessor, calling it on a new copy of the base processor every round."""
+    benchmark.pedantic(
+        function, setup=lambda: ((copy.deepcopy(base_processor),), {}), rounds=rounds, warmup_rounds=1
+    )
+
+
+@pytest.mark.benchmark(group="filter")
+@pytest.mark.parametrize("strength", [1, 3, 5])
+@pytest.mark.parametrize("filter_name", [filter_name.value for filter_name in enums.FilterName])
+def test_filter(benchmark, base_processor, filter_name, strength):
+    run_on_copies(benchmark, base_processor, lambda processor: processor.apply_filter(filter_name, strength))
+
+
+@pytest.mark.benchmark(group="adjustment")
+@pytest.mark.parametrize(
+    "adjustment, value",
+    [
+        (enums.AdjustmentType.BRIGHTNESS.value, 50),
+        (enums.AdjustmentType.CONTRAST.value, 1.5),
+        (enums.AdjustmentType.SATURATION.value, 1.5),
+    ],
+)
+def test_adjustment(benchmark, base_processor, adjustment, value):
+    run_on_copies(benchmark, base_processor, lambda processor: processor.adjust_image(adjustment, value))
@@ -4,8 +4,13 @@ from source.cli import CommandLineInterface
 
 
 class TestCommandLineInterface(unittest.TestCase):
-    @patch('source.cli.ImageProcessor')
-    def test_cli_parser_with_valid_args(self, mock_processor):
+    def setUp(self):
+        # Replace the ImageProcessor the CLI imports when it runs, so no test opens an image
+        patcher = patch('image_processor.ImageProcessor')
+        self.mock_processor = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cli_parser_with_valid_args(self):
         test_args = [
             "--image", "path/to/image.jpg",
             "--filter", "blur",
@@ -16,7 +21,38 @@ class TestCommandLineInterface(unittest.TestCase):
             cli.run()
 
         # Check if ImageProcessor was called with the correct image path
-        mock_processor.assert_called_once_with("path/to/image.jpg")
+        self.mock_processor.assert_called_once_with("path/to/image.jpg")
         # Check if filter and strength were handled correctly
-        mock_processor_instance = mock_processor.return_value
-        mock_processor_instance.apply_filter.assert_called_once_with("blur", 2)
\ No newline at end of file
+        mock_processor_instance = self.mock_processor.return_value
+        mock_processor_instance.apply_filters.assert_called_once_with(["blur"], 2)
+
+    def test_cli_rejects_invalid_adjustment_before_loading(self):
+        test_args = [
+            "--image", "path/to/image.jpg",
+            "--adjust", "brightnes", "1.5"
+        ]
+        with patch('sys.argv', ["cli.py"] + test_args), patch('sys.stderr'):
+            cli = CommandLineInterface()
+            with self.assertRaises(SystemExit):
+                cli.run()
+
+        # The image should never be opened for a mistyped adjustment
+        self.mock_processor.assert_not_called()
+
+    def test_cli_rejects_non_numeric_adjustment_value_before_loading(self):
+        test_args = [
+            "--image", "path/to/image.jpg",
+            "--adjust", "brightness", "abc"
+        ]
+        with patch('sys.argv', ["cli.py"] + test_args), patch('sys.stderr') as mock_stderr:
+            cli = CommandLineInterface()
+            with self.assertRaises(SystemExit):
+                cli.run()
+
+        # The image should never be opened for a value that isn't a number
+        self.mock_processor.assert_not_called()
+        error_output = "".join(call.args[0] for call in mock_stderr.write.call_args_list)
+        self.assertIn("invalid float value", error_output)
+
+    def test_cli_instances_share_the_parser(self):
+        self.assertIs(CommandLineInterface().parser, CommandLineInterface().parser)
@@ -0,0 +1,111 @@
+import importlib.util
+import io
+import unittest
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+from custom_image import CustomImage
+import filters
+from filters import BaseFilter, BlurFilter, EdgeDetectionFilter, SharpenFilter
+
+# PyTorch is optional, so the test of the convolution it runs is skipped without it.
+requires_torch = unittest.skipUnless(importlib.util.find_spec("torch"), "PyTorch is not installed")
+
+
+class TestBaseFilter(unittest.TestCase):
+    def test_apply_to_image_smaller_than_kernel(self):
+        """Test that applying a filter to an image smaller than its kernel raises a ValueError"""
+        image_file = io.BytesIO()
+        Image.new("RGB", (2, 2), (128, 64, 200)).save(image_file, "PNG")
+        for image_filter in (BlurFilter(), EdgeDetectionFilter(), SharpenFilter()):
+            with self.subTest(image_filter=type(image_filter).__name__):
+                image_file.seek(0)
+                with self.assertRaises(ValueError):
+                    image_filter.apply(CustomImage(image_file))
+
+    def test_pad_matches_numpy_reflect(self):
+        """Test that padding matches np.pad in "reflect" mode, also when written into a larger buffer"""
+        rng = np.random.default_rng(2)
+        for shape in ((9, 8), (9, 8, 3)):
+            image_array = rng.integers(0, 256, shape, dtype=np.uint8)
+            for width in (1, 2, 3):
+                # One buffer with extra rows is reused for every combination of edges, so it holds the previous one
+                buffer = np.full((shape[0] + 2 * width + 4, shape[1] + 2 * width) + shape[2:], 7, dtype=np.uint8)
+                for pad_top in (True, False):
+                    for pad_bottom in (True, False):
+                        with self.subTest(shape=shape, width=width, pad_top=pad_top, pad_bottom=pad_bottom):
+                            rows = (width if pad_top else 0, width if pad_bottom else 0)
+                            channels = ((0, 0),) * (image_array.ndim - 2)
+                            expected = np.pad(image_array, (rows, (width, width)) + channels, mode="reflect")
+                            padded = BaseFilter.pad(image_array, width, pad_top, pad_bottom)
+                            np.testing.assert_array_equal(padded, expected)
+
+                            padded = BaseFilter.pad(image_array, width, pad_top, pad_bottom, out=buffer)
+                            np.testing.assert_array_equal(padded, expected)
+                            self.assertTrue(np.shares_memory(padded, buffer))
+
+    def test_correlate_bands_matches_single_correlate(self):
+        """Test that correlating bands of rows on several threads gives the same sums as a single correlation"""
+        image_array = np.random.default_rng(3).integers(0, 256, (300, 40, 3), dtype=np.uint8)
+        kernels = {
+            "odd": np.arange(9, dtype=np.float32).reshape(3, 3),
+            "even": np.arange(16, dtype=np.float32).reshape(4, 4),
+            "non-square": np.arange(10, dtype=np.float32).reshape(5, 2),
+        }
+        for name, kernel in kernels.items():
+            with self.subTest(kernel=name):
+                expected = ndimage.correlate(image_array, kernel[:, :, np.newaxis], output=np.float32, mode="mirror")
+                # Enough CPUs for the 300 rows to be split into bands of at least _MIN_BAND_ROWS
+                with patch.object(filters.os, "cpu_count", return_value=8):
+                    banded = BaseFilter._correlate_bands(image_array, kernel, np.dtype(np.float32))
+                np.testing.assert_array_equal(banded, expected)
+
+    @unittest.skipUnless(filters._compiled_convolve, "the Cython convolution is not built, see `make convolve`")
+    def test_compiled_convolve_matches_scipy(self):
+        """Test that the Cython convolution gives the SciPy images, and the JIT ones up to one intensity level"""
+        image_array = np.random.default_rng(4).integers(0, 256, (40, 30, 3), dtype=np.uint8)
+        kernels = {
+            "3x3": np.full((3, 3), 1 / 9, dtype=np.float32),
+            "5x5": np.outer([1, 4, 6, 4, 1], [1, 4, 6, 4, 1]).astype(np.float32) / 256,
+        }
+        for name, kernel in kernels.items():
+            with self.subTest(kernel=name):
+                compiled = BaseFilter.convolve(image_array, kernel)
+                with patch.object(filters, "_compiled_convolve", None), patch.object(filters, "_convolve_kernel", None):
+                    np.testing.assert_array_equal(compiled, BaseFilter.convolve(image_array, kernel))
+                if filters._convolve_kernel is not None:
+                    # The JIT kernels sum in float32, which can round a pixel to the next level
+                    with patch.object(filters, "_compiled_convolve", None):
+                        jit = BaseFilter.convolve(image_array, kernel)
+                    np.testing.assert_allclose(compiled.astype(np.int16), jit, rtol=0, atol=1)
+
+    def test_convolve_on_device_dispatches_to_torch(self):
+        """Test that a device sends the padded image to PyTorch and casts its sums back to the image type"""
+        image_array = np.random.default_rng(5).integers(0, 256, (21, 18, 3), dtype=np.uint8)
+
+        def correlate_valid(padded_image, kernel, dtype, device):
+            """Stand in for conv2d, which weights only the windows that fit in the padded image."""
+            windows = np.lib.stride_tricks.sliding_window_view(padded_image, kernel.shape, axis=(0, 1))
+            return np.einsum("ijkab,ab->ijk", windows, kernel.astype(np.float64)).astype(dtype)
+
+        for kernel in (np.full((3, 3), 1 / 9, dtype=np.float32), np.full((4, 2), 1 / 8, dtype=np.float32)):
+            with self.subTest(kernel_shape=kernel.shape):
+                with patch.object(BaseFilter, "_correlate_torch", side_effect=correlate_valid) as correlate_torch:
+                    convolved = BaseFilter.convolve(image_array, kernel, device="cuda")
+                _, _, dtype, device = correlate_torch.call_args.args
+                self.assertEqual((dtype, device), (np.float32, "cuda"))
+                expected = ndimage.correlate(image_array, kernel[:, :, np.newaxis], output=np.float32, mode="mirror")
+                np.testing.assert_array_equal(convolved, expected.astype(np.uint8))
+
+    @requires_torch
+    def test_convolve_on_cpu_device_matches_correlate(self):
+        """Test that convolving with PyTorch gives the same sums as SciPy, for float and integer kernels"""
+        image_array = np.random.default_rng(6).integers(0, 256, (21, 18, 3), dtype=np.uint8)
+        for kernel in (np.full((3, 3), 1 / 9, dtype=np.float32), np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])):
+            with self.subTest(kernel_dtype=kernel.dtype.name):
+                dtype = BaseFilter._sum_dtype(image_array, kernel)
+                expected = ndimage.correlate(image_array, kernel[:, :, np.newaxis], output=dtype, mode="mirror")
+                np.testing.assert_array_equal(
+                    BaseFilter.convolve(image_array, kernel, device="cpu"), expected.astype(np.uint8)
+                )
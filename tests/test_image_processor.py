@@ -1,21 +1,49 @@
+import copy
+import gc
+import io
 import os
+import tempfile
 import unittest
+import warnings
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+import source.image_processor
 from source.image_processor import ImageProcessor
 import source.enums as enums
 
+# The sample image, relative to the location of this file.
+SAMPLE_IMAGE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "../input/image_to_filter.jpg"))
+
+# Skips a test that needs the sample image when it is missing, instead of failing it.
+requires_sample_image = unittest.skipUnless(os.path.exists(SAMPLE_IMAGE_PATH), "sample image missing")
+
+
+def processor_for(image):
+    """Build an ImageProcessor for an in-memory PIL image, through a PNG file in memory."""
+    image_file = io.BytesIO()
+    image.save(image_file, "PNG")
+    image_file.seek(0)
+    return ImageProcessor(image_file)
+
 
 class TestImageProcessor(unittest.TestCase):
+    image_path = SAMPLE_IMAGE_PATH
+
+    @classmethod
+    def setUpClass(cls):
+        """Decode the test images once for the whole class."""
+        if os.path.exists(cls.image_path):
+            cls.base_processor = ImageProcessor(cls.image_path)
+        # The tests that only check that nothing raises run on a tiny image of a single color, which goes through
+        # the same code as the sample image at a fraction of the cost.
+        cls.tiny_processor = processor_for(Image.new("RGB", (32, 32), (128, 64, 200)))
+
     def setUp(self):
-        """Set up for the test using the content root."""
-        # Get the directory of this file/script.
-        base_dir = os.path.dirname(__file__)
-        # Construct the image path relative to the script location.
-        self.image_path = os.path.join(base_dir, "../input/image_to_filter.jpg")
-        self.image_path = os.path.normpath(self.image_path)
-        # Ensure the output directory path is constructed similarly.
-        self.output_path = os.path.normpath(os.path.join(base_dir, "output"))
-        self.processor = ImageProcessor(self.image_path)
+        """Give every test its own copy of the decoded image, so the filters applied by one don't leak into another."""
+        self.processor = copy.deepcopy(self.tiny_processor)
 
+    @requires_sample_image
     def test_initialization_on_success(self):
         """Test that initialization with a valid path does not raise an exception"""
         try:
@@ -29,6 +57,21 @@ class TestImageProcessor(unittest.TestCase):
             ImageProcessor("path/to/nonexistent/image.jpg")
         self.assertIn("unable to open image: ", str(context.exception).lower())
 
+    def test_load_multi_frame_image_closes_file(self):
+        """Test that loading an animated GIF closes its file and keeps the pixels of the first frame"""
+        frames = [Image.new("L", (8, 6), value) for value in (40, 160)]
+        with tempfile.TemporaryDirectory() as input_dir:
+            image_path = os.path.join(input_dir, "animated.gif")
+            frames[0].save(image_path, save_all=True, append_images=frames[1:])
+            with warnings.catch_warnings(record=True) as caught_warnings:
+                warnings.simplefilter("always", ResourceWarning)
+                processor = ImageProcessor(image_path)
+                self.assertEqual(processor.custom_image.as_array("L").tolist(), np.asarray(frames[0]).tolist())
+                # A file left open is only reported when it is garbage collected along with the image
+                del processor
+                gc.collect()
+            self.assertEqual([w for w in caught_warnings if issubclass(w.category, ResourceWarning)], [])
+
     def test_apply_filter_on_success(self):
         """Test that applying a filter does not raise an exception"""
         try:
@@ -45,29 +88,30 @@ class TestImageProcessor(unittest.TestCase):
         self.assertIn("not supported", str(context.exception).lower())
         self.assertIn("filter", str(context.exception).lower())
 
-    def test_apply_blur_filter(self):
-        """Test the blur filter"""
-        try:
-            self.processor.apply_filter(enums.FilterName.BLUR.value, 1)
-            self.processor.save_image(self.output_path + "/blurred_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Applying blur filter raised an exception {e}")
-
-    def test_apply_edge_detection_filter(self):
-        """Test the edge detection filter"""
-        try:
-            self.processor.apply_filter(enums.FilterName.EDGE_DETECTION.value, 1)
-            self.processor.save_image(self.output_path + "/edge_detected_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Applying edge detection filter raised an exception {e}")
+    def test_apply_each_filter(self):
+        """Test each filter on its own copy of the image"""
+        for filter_name in enums.FilterName:
+            with self.subTest(filter_name=filter_name.value):
+                processor = copy.deepcopy(self.tiny_processor)
+                try:
+                    processor.apply_filter(filter_name.value, 1)
+                    processor.save_image(io.BytesIO(), "PPM")
+                except Exception as e:
+                    self.fail(f"Applying {filter_name.value} filter raised an exception {e}")
 
-    def test_apply_sharpen_filter(self):
-        """Test the sharpen filter"""
-        try:
-            self.processor.apply_filter(enums.FilterName.SHARPEN.value, 1)
-            self.processor.save_image(self.output_path + "/sharpened_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Applying sharpen filter raised an exception {e}")
+    def test_apply_filter_to_image_smaller_than_kernel(self):
+        """Test that filtering an image smaller than the 3x3 kernels raises a ValueError"""
+        for size in ((1, 1), (2, 2), (2, 5)):
+            for filter_name in enums.FilterName:
+                with self.subTest(size=size, filter_name=filter_name.value):
+                    processor = processor_for(Image.new("RGB", size, (128, 64, 200)))
+                    with self.assertRaises(ValueError) as context:
+                        processor.apply_filter(filter_name.value, 1)
+                    self.assertIn("kernel size", str(context.exception).lower())
+        # The smallest image a 3x3 kernel fits in is filtered
+        processor = processor_for(Image.new("RGB", (3, 3), (128, 64, 200)))
+        processor.apply_filter(enums.FilterName.BLUR.value, 1)
+        self.assertEqual(processor.custom_image.get_image().size, (3, 3))
 
     def test_adjust_image_on_success(self):
         """Test image adjustments do not raise exceptions"""
@@ -85,46 +129,170 @@ class TestImageProcessor(unittest.TestCase):
         self.assertIn("not supported", str(context.exception).lower())
         self.assertIn("adjustment type", str(context.exception).lower())
 
-    def test_brightness_adjustment(self):
-        """Test the brightness adjustment"""
-        try:
-            self.processor.adjust_image(enums.AdjustmentType.BRIGHTNESS.value, 50)
-            self.processor.save_image(self.output_path + "/brightened_image_result.jpg")
-            self.processor.adjust_image(enums.AdjustmentType.BRIGHTNESS.value, -50)
-            self.processor.save_image(self.output_path + "/darkened_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Adjusting brightness raised an exception {e}")
+    def test_each_adjustment(self):
+        """Test raising and then lowering each adjustment on its own copy of the image"""
+        adjustments = [
+            (enums.AdjustmentType.BRIGHTNESS, 50, -50),
+            (enums.AdjustmentType.CONTRAST, 1.5, 0.5),
+            (enums.AdjustmentType.SATURATION, 1.5, 0.5),
+        ]
+        # Every result is written over the previous one in the same buffer
+        buffer = io.BytesIO()
+        for adjustment, raised_value, lowered_value in adjustments:
+            with self.subTest(adjustment=adjustment.value):
+                processor = copy.deepcopy(self.tiny_processor)
+                try:
+                    for value in (raised_value, lowered_value):
+                        processor.adjust_image(adjustment.value, value)
+                        buffer.seek(0)
+                        buffer.truncate()
+                        processor.save_image(buffer, "PPM")
+                        self.assertGreater(buffer.tell(), 0)
+                except Exception as e:
+                    self.fail(f"Adjusting {adjustment.value} raised an exception {e}")
 
-    def test_contrast_adjustment(self):
-        """Test the contrast adjustment"""
-        try:
-            self.processor.adjust_image(enums.AdjustmentType.CONTRAST.value, 1.5)
-            self.processor.save_image(self.output_path + "/high_contrast_image_result.jpg")
-            self.processor.adjust_image(enums.AdjustmentType.CONTRAST.value, 0.5)
-            self.processor.save_image(self.output_path + "/low_contrast_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Adjusting contrast raised an exception {e}")
+    def test_contrast_keeps_two_channel_images(self):
+        """Test that adjusting the contrast of an LA image gives an LA image, with and without the Numba ufuncs"""
+        image = Image.merge("LA", (Image.linear_gradient("L"), Image.new("L", (256, 256), 200)))
+        for adjustment_kernels in (source.image_processor._adjustment_kernels, None):
+            with self.subTest(numba=adjustment_kernels is not None):
+                processor = processor_for(image)
+                with patch.object(source.image_processor, "_adjustment_kernels", adjustment_kernels):
+                    processor.adjust_image(enums.AdjustmentType.CONTRAST.value, 1.5)
+                self.assertEqual(processor.custom_image.get_image().mode, "LA")
 
-    def test_saturation_adjustment(self):
-        """Test the saturation adjustment"""
-        try:
-            self.processor.adjust_image(enums.AdjustmentType.SATURATION.value, 1.5)
-            self.processor.save_image(self.output_path + "/saturated_image_result.jpg")
-            self.processor.adjust_image(enums.AdjustmentType.SATURATION.value, 0.5)
-            self.processor.save_image(self.output_path + "/desaturated_image_result.jpg")
-        except Exception as e:
-            self.fail(f"Adjusting saturation raised an exception {e}")
+    def test_contrast_of_images_without_byte_bands(self):
+        """Test that the contrast of 16-bit and bilevel images is adjusted into an L image"""
+        gradient = np.tile(np.arange(40, dtype=np.uint16) * 10, (30, 1))
+        images = {
+            "I;16": Image.fromarray(gradient),
+            "1": Image.fromarray(gradient % 20 == 0),
+        }
+        for mode, image in images.items():
+            self.assertEqual(image.mode, mode)
+            for adjustment_kernels in (source.image_processor._adjustment_kernels, None):
+                with self.subTest(mode=mode, numba=adjustment_kernels is not None):
+                    processor = processor_for(image)
+                    with patch.object(source.image_processor, "_adjustment_kernels", adjustment_kernels):
+                        processor.adjust_image(enums.AdjustmentType.CONTRAST.value, 1.5)
+                    adjusted_array = np.asarray(processor.custom_image.get_image())
+                    self.assertEqual(processor.custom_image.get_image().mode, "L")
+                    self.assertEqual(adjusted_array.shape, (30, 40))
+                    # The values are normalized by 255 as for 8-bit images, so those above 255 saturate
+                    values = np.asarray(image, dtype=np.float32) / np.float32(255)
+                    mean = np.mean(values)
+                    expected = np.clip(mean + (values - mean) * 1.5, 0, 1) * 255
+                    np.testing.assert_array_equal(adjusted_array, expected.astype(np.uint8))
+
+    def test_contrast_of_palette_and_cmyk_images(self):
+        """Test that the contrast of palette and CMYK images gives the same image with and without Numba"""
+        colors = np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8)
+        images = {
+            "P": (Image.fromarray(colors).convert("P"), "L"),
+            "CMYK": (Image.fromarray(colors).convert("CMYK"), "RGBA"),
+        }
+        for mode, (image, adjusted_mode) in images.items():
+            adjusted_images = []
+            for adjustment_kernels in (source.image_processor._adjustment_kernels, None):
+                with self.subTest(mode=mode, numba=adjustment_kernels is not None):
+                    processor = copy.deepcopy(self.processor)
+                    processor.custom_image.set_image(image)
+                    with patch.object(source.image_processor, "_adjustment_kernels", adjustment_kernels):
+                        processor.adjust_image(enums.AdjustmentType.CONTRAST.value, 1.5)
+                    self.assertEqual(processor.custom_image.get_image().mode, adjusted_mode)
+                    adjusted_images.append(processor.custom_image.get_image().tobytes())
+            self.assertEqual(adjusted_images[0], adjusted_images[1])
+
+    @requires_sample_image
+    def test_pipeline_matches_step_by_step(self):
+        """Test that a pipeline gives the same image as applying its steps one at a time"""
+        steps = [
+            ("adjust", enums.AdjustmentType.BRIGHTNESS.value, 20),
+            ("adjust", enums.AdjustmentType.CONTRAST.value, 1.5),
+            ("filter", enums.FilterName.SHARPEN.value, 1),
+            ("adjust", enums.AdjustmentType.SATURATION.value, 1.5),
+            ("adjust", enums.AdjustmentType.CONTRAST.value, 0.5),
+        ]
+        self.processor = copy.deepcopy(self.base_processor)
+        self.processor.pipeline(steps)
+        expected = copy.deepcopy(self.base_processor)
+        expected.adjust_image(enums.AdjustmentType.BRIGHTNESS.value, 20)
+        expected.adjust_image(enums.AdjustmentType.CONTRAST.value, 1.5)
+        expected.apply_filter(enums.FilterName.SHARPEN.value, 1)
+        expected.adjust_image(enums.AdjustmentType.SATURATION.value, 1.5)
+        expected.adjust_image(enums.AdjustmentType.CONTRAST.value, 0.5)
+        self.assertEqual(
+            self.processor.custom_image.get_image().tobytes(), expected.custom_image.get_image().tobytes()
+        )
 
+    def test_pipeline_of_palette_and_cmyk_images(self):
+        """Test that a pipeline on a palette or CMYK image gives the same image as applying its steps one at a time"""
+        colors = np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8)
+        recipes = [
+            [],
+            [("adjust", enums.AdjustmentType.CONTRAST.value, 1.5)],
+            [("adjust", enums.AdjustmentType.BRIGHTNESS.value, 20)],
+            [("filter", enums.FilterName.BLUR.value, 1)],
+            [
+                ("adjust", enums.AdjustmentType.CONTRAST.value, 1.5),
+                ("adjust", enums.AdjustmentType.BRIGHTNESS.value, 20),
+                ("filter", enums.FilterName.SHARPEN.value, 1),
+            ],
+        ]
+        for mode in ("P", "CMYK"):
+            image = Image.fromarray(colors).convert(mode)
+            for steps in recipes:
+                with self.subTest(mode=mode, steps=steps):
+                    processor = copy.deepcopy(self.processor)
+                    processor.custom_image.set_image(image)
+                    expected = copy.deepcopy(processor)
+                    processor.pipeline(steps)
+                    for kind, name, value in steps:
+                        if kind == "filter":
+                            expected.apply_filters([name], value)
+                        else:
+                            expected.adjust_image(name, value)
+                    self.assertEqual(processor.custom_image.get_image().mode, expected.custom_image.get_image().mode)
+                    self.assertEqual(
+                        processor.custom_image.get_image().tobytes(), expected.custom_image.get_image().tobytes()
+                    )
+
+    def test_pipeline_on_value_error(self):
+        """Test that a pipeline with an unsupported step raises a ValueError"""
+        with self.assertRaises(ValueError) as context:
+            self.processor.pipeline([("adjust", enums.AdjustmentType.BRIGHTNESS.value, 20), ("filter", "invalid", 1)])
+        self.assertIn("not supported", str(context.exception).lower())
+
+    def test_set_array_leaves_array_writable(self):
+        """Test that caching an array set on the image does not make the caller's array read-only"""
+        array = np.zeros((4, 5, 3), dtype=np.uint8)
+        self.processor.custom_image.set_array(array)
+        self.assertTrue(array.flags.writeable)
+        self.assertFalse(self.processor.custom_image.as_array("RGB").flags.writeable)
+
+    @requires_sample_image
     def test_save_image(self):
         """Test image saving functionality"""
-        try:
-            # Assume we're saving to a test directory, ensure this directory exists
-            self.processor.save_image(
-                "/Users/srashkovits/PycharmProjects/onboarding-to-lightricks/output"
-                "/filtered_image_result.jpg"
-            )
-        except IOError as e:
-            self.fail(f"Saving image raised an exception {e}")
+        self.processor = copy.deepcopy(self.base_processor)
+        # Save to a temporary directory, which is removed with the file at the end of the test
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, "filtered_image_result.jpg")
+            try:
+                self.processor.save_image(output_path)
+            except IOError as e:
+                self.fail(f"Saving image raised an exception {e}")
+            with Image.open(output_path) as saved_image:
+                self.assertEqual(saved_image.format, "JPEG")
+                self.assertEqual(saved_image.size, self.processor.custom_image.get_image().size)
+
+    def test_save_image_to_file_object(self):
+        """Test that an image saved to a file object in a given format can be read back"""
+        buffer = io.BytesIO()
+        self.processor.save_image(buffer, "PNG")
+        buffer.seek(0)
+        with Image.open(buffer) as saved_image:
+            self.assertEqual(saved_image.format, "PNG")
+            self.assertEqual(saved_image.tobytes(), self.processor.custom_image.get_image().tobytes())
 
     def test_save_image_failure(self):
         """Test that saving an image to a non-existent directory raises an IOError"""
@@ -0,0 +1,59 @@
+import io
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+import filters
+import pipeline
+from custom_image import CustomImage
+from filters import BlurFilter, EdgeDetectionFilter, SharpenFilter
+from pipeline import FilterPipeline
+
+
+class TestFilterPipeline(unittest.TestCase):
+    def setUp(self):
+        # A small random image, with a height that no block size below divides
+        self.image_array = np.random.default_rng(0).integers(0, 256, (23, 17, 3), dtype=np.uint8)
+        # Filters of both modes, some of them more than once in a row
+        self.filters = [
+            BlurFilter(),
+            BlurFilter(),
+            EdgeDetectionFilter(),
+            SharpenFilter(),
+            SharpenFilter(),
+            BlurFilter(),
+        ]
+
+    def filter_whole_image(self):
+        """Apply the filters one after another, each to the whole image."""
+        image_file = io.BytesIO()
+        Image.fromarray(self.image_array).save(image_file, "PNG")
+        image_file.seek(0)
+        custom_image = CustomImage(image_file)
+        for image_filter in self.filters:
+            image_filter.apply(custom_image)
+        return np.asarray(custom_image.get_image())
+
+    def test_blocks_match_whole_image(self):
+        """Test that filtering blocks of rows gives the same image as filtering the whole image"""
+        for max_workers in (1, 3):
+            with ExitStack() as stack:
+                if max_workers > 1 and filters.KERNELS_MULTITHREADED:
+                    # The JIT kernels cannot run on several threads, so the pipeline would only use one. Filter with
+                    # SciPy instead to stitch blocks filtered on a pool of threads.
+                    stack.enter_context(patch.object(filters, "kernels", None))
+                    stack.enter_context(patch.object(pipeline, "KERNELS_MULTITHREADED", False))
+                expected = self.filter_whole_image()
+                for block_rows in (1, 2, 7):
+                    with self.subTest(block_rows=block_rows, max_workers=max_workers):
+                        filter_pipeline = FilterPipeline(block_rows=block_rows, max_workers=max_workers)
+                        self.assertEqual(filter_pipeline.max_workers, max_workers)
+                        for image_filter in self.filters:
+                            filter_pipeline.add(image_filter)
+                        np.testing.assert_array_equal(filter_pipeline.run(self.image_array), expected)
+
+    def test_single_worker_with_jit_kernels(self):
+        """Test that the pipeline filters one block at a time while the JIT kernels are in use"""
+        with patch.object(pipeline, "KERNELS_MULTITHREADED", True):
+            self.assertEqual(FilterPipeline(max_workers=3).max_workers, 1)